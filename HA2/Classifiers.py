@@ -0,0 +1,280 @@
+"""
+Perceptron and logistic regression classifiers for Home Assignment 2 for the course EDAP01 - Artificial Intelligence
+given at LTH.
+
+Both classifiers have a learning rate decreasing according to 1000/(1000+iteration) and terminate when the number of
+misclassified samples in an epoch is at most misclass_tol. Training is either online (one sample at a time, as in the
+notebook), full batch or mini batch, where the two latter predict a whole batch with one matrix product.
+Online training updates w += lr*(label - prediction)*x with the thresholded prediction, so there logistic regression
+gives the same weights as the perceptron. The vectorized modes update with the activation itself, label - sigmoid(w @ x)
+for logistic regression, averaged over the batch, and train in standardized feature coordinates.
+
+Author Eric Rostedt.
+"""
+
+# Imports
+import numpy as np
+
+# Initial learning rate of the vectorized modes. The mean gradient of the logistic loss changes by at most 1/4 per unit
+# step along a standardized feature, so this is the largest rate which does not overshoot along a single feature.
+VECTORIZED_LEARNING_RATE = 4
+
+
+def step(z):
+    """
+    Step function, activation of the perceptron.
+    :param z: Activations w @ x.
+    :returns: 1 where z > 0, 0 else.
+    """
+    return (z > 0).astype(float)
+
+
+def sigmoid(z):
+    """
+    Numerically stable logistic function, 1/(1+exp(-z)) computed without overflow for large |z|.
+    :param z: Activations w @ x.
+    :returns: Probabilities of class 1.
+    """
+    return np.exp(-np.logaddexp(0, -z))
+
+
+def predict(X, w):
+    """
+    Predicts the class of every sample, 1 if w @ x > 0 and 0 else. Same for both classifiers since sigmoid(z) > 0.5
+    if and only if z > 0.
+    :param X: Scaled feature matrix X.
+    :param w: Weights w.
+    :returns: Predicted classes.
+    """
+    return step(X @ w)
+
+
+def count_misclassified(X, y, w):
+    """
+    :param X: Scaled feature matrix X.
+    :param y: Class vector y.
+    :param w: Weights w.
+    :returns: Number of misclassified samples.
+    """
+    return int(np.count_nonzero(predict(X, w) != np.ravel(y)))
+
+
+def training_order(rng, num_samples, held_out):
+    """
+    Random order of the training samples, all samples but the held out ones, without a mask over all samples.
+    :param rng: Random generator.
+    :param num_samples: Number of training samples.
+    :param held_out: Sorted indices of the held out samples.
+    :returns: Shuffled indices of the training samples.
+    """
+    order = rng.permutation(num_samples)
+    if len(held_out):
+        # The k:th training sample is sample k plus the number of held out samples before it.
+        order += np.searchsorted(held_out - np.arange(len(held_out)), order, side='right')
+    return order
+
+
+def standardization(X, held_out):
+    """
+    Mean and standard deviation of the features over the training samples, used to train the vectorized modes in
+    standardized coordinates (x - mean)/std without copying X. Constant columns are left as they are, and the features
+    are only centered if there is a constant nonzero column (the intercept) whose weight can absorb the shift.
+    :param X: Feature matrix X.
+    :param held_out: Sorted indices of the held out samples, their contribution is subtracted from the sums.
+    :returns mean, std, intercept: Per feature mean and std, and the unit vector of the intercept column divided by
+                                   its value (zeros if there is none).
+    """
+    total = np.sum(X, axis=0)
+    total_square = np.einsum('ij,ij->j', X, X)
+    if len(held_out):
+        X_held_out = X[held_out]
+        total -= np.sum(X_held_out, axis=0)
+        total_square -= np.einsum('ij,ij->j', X_held_out, X_held_out)
+    num_samples = len(X) - len(held_out)
+    mean = total / num_samples
+    std = np.sqrt(np.maximum(total_square / num_samples - mean**2, 0))
+    constant = std <= 1e-12 * np.maximum(np.abs(mean), 1)
+    intercept = np.zeros_like(mean)
+    intercepts = np.flatnonzero(constant & (mean != 0))
+    if len(intercepts):
+        intercept[intercepts[0]] = 1 / mean[intercepts[0]]
+        mean[constant] = 0
+    else:
+        mean[:] = 0
+    std[constant] = 1
+    return mean, std, intercept
+
+
+def to_original(w, mean, std, intercept):
+    """
+    Converts standardized weights to weights of the original features, giving the same activations.
+    :returns: Weights of the original features.
+    """
+    return w / std - intercept * np.sum(w * mean / std)
+
+
+def to_standardized(v, mean, std, intercept):
+    """
+    Converts weights of the original features to standardized weights, inverse of to_original.
+    :returns: Standardized weights.
+    """
+    return v * std + intercept * np.sum(v * mean)
+
+
+def train(X, y, w, activation, misclass_tol=1, maxit=10000, suppress_prints=False, mode='online', batch_size=32,
+          tol=None, seed=None, held_out=None):
+    """
+    Trains a linear classifier, decreasing learning rate according to 1000/(1000+iteration).
+    Online mode is the notebook's algorithm, update w += lr*(label - prediction)*x for one sample at a time, where the
+    prediction is 1 if activation(w @ x) > 0.5 and 0 else, and misclassifications counted while updating. Since
+    sigmoid(z) > 0.5 if and only if z > 0, logistic regression gives the same weights as the perceptron in online mode.
+    The vectorized modes predict a whole batch with one matrix product and average the updates of its samples,
+    w += lr * X.T @ (y - activation(X @ w)) / len(batch), such that the step does not grow with the number of samples.
+    For logistic regression this is gradient ascent on the mean log likelihood, and the learning rate starts at
+    VECTORIZED_LEARNING_RATE instead of 1. They train in standardized feature coordinates (without copying X),
+    otherwise the intercept dominates the scaled features and they do not converge. There the misclassifications are
+    counted with the weights at the end of the epoch, and tol compares the mean of the weights over the updates of
+    consecutive epochs, which unlike the weights themselves does not fluctuate with the noise of the minibatches.
+    :param X: Scaled feature matrix X.
+    :param y: Class vector y.
+    :param w: Initial weights w, not modified.
+    :param activation: Activation function, step or sigmoid.
+    :(Optional) param misclass_tol: Terminating criterion, if number of misclassified is
+                            smaller than (or equal to) misclass_tol the method terminates.
+    :(Optional) param maxit: Maximal amount of iterations (epochs).
+    :(Optional) param suppress_prints: Hides prints if set to true.
+    :(Optional) param mode: 'online' (one sample at a time), 'batch' (all samples at once) or 'minibatch'.
+    :(Optional) param batch_size: Number of samples per update in minibatch mode.
+    :(Optional) param tol: Early stopping, terminates if the relative change of w over an epoch is below tol. Useful
+                           if the classes are not separable, e.g. 1e-4.
+    :(Optional) param seed: Seed of the sample shuffling.
+    :(Optional) param held_out: Indices of samples which are not trained on, e.g. the test fold of a cross validation.
+                                Neither the data is copied nor any array over all samples is built for them.
+    :returns w: Weights w.
+    """
+    if mode not in ('online', 'batch', 'minibatch'):
+        raise ValueError("mode must be 'online', 'batch' or 'minibatch', got {!r}".format(mode))
+    X = np.asarray(X, dtype=float)
+    y = np.ravel(y).astype(float)
+    w = np.array(w, dtype=float)
+    held_out = np.unique(held_out if held_out is not None else np.empty(0, dtype=np.int64))
+    pool_size = len(y) - len(held_out)
+    rng = np.random.default_rng(seed)
+    if mode == 'online':
+        return train_online(X, y, w, activation, misclass_tol, maxit, suppress_prints, tol, rng, pool_size, held_out)
+
+    if mode == 'batch':
+        batch_size = pool_size
+    mean, std, intercept = standardization(X, held_out)
+    w = to_standardized(w, mean, std, intercept)
+
+    lr = VECTORIZED_LEARNING_RATE
+    converged = False
+    w_mean = w.copy()
+    for i in range(1, maxit+1):
+        w_prev = w_mean
+        if mode == 'batch':
+            error = y - activation(X @ to_original(w, mean, std, intercept))
+            error[held_out] = 0
+            w += lr * (X.T @ error - mean * np.sum(error)) / std / pool_size
+            w_mean = w.copy()
+        else:
+            sample_order = training_order(rng, pool_size, held_out)
+            w_sum = np.zeros_like(w)
+            for start in range(0, pool_size, batch_size):
+                batch = sample_order[start:start+batch_size]
+                X_batch = X[batch]
+                error = y[batch] - activation(X_batch @ to_original(w, mean, std, intercept))
+                w += lr * (X_batch.T @ error - mean * np.sum(error)) / std / len(batch)
+                w_sum += w
+            w_mean = w_sum / -(-pool_size // batch_size)
+
+        wrong = (X @ to_original(w, mean, std, intercept) > 0) != y
+        misclassified = np.count_nonzero(wrong) - np.count_nonzero(wrong[held_out])
+        if misclassified <= misclass_tol:
+            if not suppress_prints:
+                print('Terminated at iteration: {}'.format(i))
+            converged = True
+            break
+        if tol is not None and np.linalg.norm(w_mean - w_prev) <= tol * max(np.linalg.norm(w_mean), 1e-12):
+            if not suppress_prints:
+                print('Weights converged at iteration: {}'.format(i))
+            converged = True
+            break
+        lr = VECTORIZED_LEARNING_RATE*1000/(1000+i)
+    if not suppress_prints:
+        if not converged:
+            print('Max iterations reached.')
+    return to_original(w, mean, std, intercept)
+
+
+def train_online(X, y, w, activation, misclass_tol, maxit, suppress_prints, tol, rng, pool_size, held_out):
+    """
+    Online mode of train, one sample at a time as in the notebook. See train for the parameters.
+    :returns w: Weights w.
+    """
+    lr = 1
+    converged = False
+    for i in range(1, maxit+1):
+        w_prev = w.copy()
+        misclassified = 0
+        for sample_idx in training_order(rng, pool_size, held_out):
+            sample = X[sample_idx]
+            error = y[sample_idx] - (activation(sample @ w) > 0.5)
+            w += lr * error * sample
+            if error != 0:
+                misclassified += 1
+
+        if misclassified <= misclass_tol:
+            if not suppress_prints:
+                print('Terminated at iteration: {}'.format(i))
+            converged = True
+            break
+        if tol is not None and np.linalg.norm(w - w_prev) <= tol * max(np.linalg.norm(w), 1e-12):
+            if not suppress_prints:
+                print('Weights converged at iteration: {}'.format(i))
+            converged = True
+            break
+        lr = 1000/(1000+i)
+    if not suppress_prints:
+        if not converged:
+            print('Max iterations reached.')
+    return w
+
+
+def perceptron(X, y, w, misclass_tol=1, maxit=10000, suppress_prints=False, mode='online', batch_size=32, tol=None,
+               seed=None, held_out=None):
+    """
+    Perceptron algorithm, decreasing learning rate according to 1000/(1000+iteration).
+    :param X: Scaled feature matrix X.
+    :param y: Class vector y.
+    :param w: Intitial weigths w.
+    :(Optional) param missclass_tol: Terminating criterion, if number of missclassified is
+                            smaller than (or equal to) missclass_tol the method terminates.
+    :(Optional) param maxit: Maximal amount of iterations.
+    :(Optional) param suppress_prints: Hides prints if set to true.
+    :(Optional) param mode, batch_size, tol, seed, held_out: See train.
+    :returns w: Weights w.
+    """
+    return train(X, y, w, step, misclass_tol=misclass_tol, maxit=maxit, suppress_prints=suppress_prints, mode=mode,
+                 batch_size=batch_size, tol=tol, seed=seed, held_out=held_out)
+
+
+def logr(X, y, w, misclass_tol=1, maxit=10000, suppress_prints=False, mode='online', batch_size=32, tol=None,
+         seed=None, held_out=None):
+    """
+    Classification algorithm, with logistic function as activation function.
+    decreasing learning rate according to 1000/(1000+iteration).
+    In online mode the weights are the same as those of the perceptron, the vectorized modes use the probabilities.
+    :param X: Scaled feature matrix X.
+    :param y: Class vector y.
+    :param w: Intitial weigths w.
+    :(Optional) param missclass_tol: Terminating criterion, if number of missclassified is
+                            smaller than (or equal to) missclass_tol the method terminates.
+    :(Optional) param maxit: Maximal amount of iterations.
+    :(Optional) param suppress_prints: Hides prints if set to true.
+    :(Optional) param mode, batch_size, tol, seed, held_out: See train.
+    :returns w: Weights w.
+    """
+    return train(X, y, w, sigmoid, misclass_tol=misclass_tol, maxit=maxit, suppress_prints=suppress_prints,
+                 mode=mode, batch_size=batch_size, tol=tol, seed=seed, held_out=held_out)
@@ -0,0 +1,281 @@
+"""
+Streaming reader and writer for datasets in LibSVM form, for Home Assignment 2 for the course EDAP01 - Artificial
+Intelligence given at LTH.
+
+Every line of a LibSVM file is a label followed by index:value pairs, indices starting at 1. Indices may be missing
+(the value is then 0) or out of order. Files are parsed in chunks of lines, such that arbitrarily large files can be
+processed block by block, and the parsed result can be cached as memory mapped .npy files.
+
+Author Eric Rostedt.
+"""
+
+# Imports
+import itertools
+import json
+import os
+import numpy as np
+
+
+class FeatureStats:
+    """
+    Scaling statistics of the features, accumulated block by block in one streaming pass.
+    """
+    def __init__(self, num_features):
+        """
+        :param num_features: Number of features.
+        """
+        self.count = 0
+        self.sum = np.zeros(num_features)
+        self.sum_sq = np.zeros(num_features)
+        self.min = np.full(num_features, np.inf)
+        self.max = np.full(num_features, -np.inf)
+
+    def update(self, X):
+        """
+        Adds a dense block of samples to the statistics.
+        :param X: Feature block of shape (samples, num_features).
+        """
+        if len(X) == 0:
+            return
+        self.count += len(X)
+        self.sum += np.sum(X, axis=0, dtype=np.float64)
+        self.sum_sq += np.einsum('ij,ij->j', X, X, dtype=np.float64)
+        self.min = np.minimum(self.min, np.min(X, axis=0))
+        self.max = np.maximum(self.max, np.max(X, axis=0))
+
+    def resize(self, num_features):
+        """
+        Widens the statistics to more features, which were 0 in all samples added so far.
+        :param num_features: New number of features, at least the current one.
+        """
+        pad = num_features - len(self.sum)
+        if pad <= 0:
+            return
+        seen = 0 if self.count else np.inf
+        self.sum = np.pad(self.sum, (0, pad))
+        self.sum_sq = np.pad(self.sum_sq, (0, pad))
+        self.min = np.pad(self.min, (0, pad), constant_values=seen)
+        self.max = np.pad(self.max, (0, pad), constant_values=-seen)
+
+    @property
+    def mean(self):
+        """
+        :returns: Mean of every feature.
+        """
+        return self.sum / self.count
+
+    @property
+    def std(self):
+        """
+        :returns: Standard deviation of every feature.
+        """
+        return np.sqrt(np.maximum(self.sum_sq / self.count - self.mean**2, 0))
+
+
+def parse_lines(lines, num_features=None):
+    """
+    Parses LibSVM lines into the arrays of a CSR matrix.
+    :param lines: List of lines.
+    :(Optional) param num_features: Number of features, indices above it are ignored. If None all are kept.
+    :returns y, values, indices, indptr: Labels and the CSR arrays (indices starting at 0).
+    """
+    labels = []
+    pairs = []
+    counts = []
+    for line in lines:
+        fields = line.split(None, 1)
+        if not fields:
+            continue
+        labels.append(fields[0])
+        rest = fields[1] if len(fields) > 1 else ''
+        counts.append(rest.count(':'))
+        pairs.append(rest)
+    y = np.array(labels, dtype=float)
+    # All index:value pairs of the chunk are parsed by numpy at once.
+    parsed = np.fromstring(' '.join(pairs).replace(':', ' '), sep=' ').reshape(-1, 2)
+    indices = parsed[:, 0].astype(np.int64) - 1
+    values = parsed[:, 1]
+    indptr = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+
+    keep = indices >= 0
+    if num_features is not None:
+        keep &= indices < num_features
+    if not np.all(keep):
+        rows = np.repeat(np.arange(len(counts)), counts)
+        np.cumsum(np.bincount(rows[keep], minlength=len(counts)), out=indptr[1:])
+        indices, values = indices[keep], values[keep]
+    return y, values, indices, indptr
+
+
+def to_dense(values, indices, indptr, num_features, dtype=np.float32):
+    """
+    Converts CSR arrays to a dense block. Repeated indices in a row are summed.
+    :returns X: Dense block of shape (rows, num_features).
+    """
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    X = np.zeros((len(indptr) - 1, num_features), dtype=dtype)
+    np.add.at(X, (rows, indices), values)
+    return X
+
+
+def read_raw_chunks(path, chunk_size=65536, num_features=None):
+    """
+    Generator of parsed chunks of a LibSVM file as CSR arrays.
+    :param path: Path of the file.
+    :(Optional) param chunk_size: Number of lines per chunk.
+    :(Optional) param num_features: Number of features, indices above it are ignored. If None all are kept.
+    :returns: Generator of (y, values, indices, indptr).
+    """
+    with open(path) as f:
+        while True:
+            lines = list(itertools.islice(f, chunk_size))
+            if not lines:
+                return
+            yield parse_lines(lines, num_features)
+
+
+def read_libsvm_chunks(path, chunk_size=65536, num_features=None, sparse=False, dtype=np.float32):
+    """
+    Generator of batches of a LibSVM file, in one pass over the file.
+    :param path: Path of the file.
+    :(Optional) param chunk_size: Number of samples per batch.
+    :(Optional) param num_features: Number of features. If None the batches are as wide as the largest index read so
+                                    far, so later batches may be wider than earlier ones.
+    :(Optional) param sparse: Yields scipy.sparse CSR matrices instead of dense blocks (requires scipy).
+    :(Optional) param dtype: Data type of the features.
+    :returns: Generator of (X, y), X of shape (samples, num_features).
+    """
+    if sparse:
+        from scipy.sparse import csr_matrix
+    width = num_features or 0
+    for y, values, indices, indptr in read_raw_chunks(path, chunk_size, num_features):
+        if num_features is None and len(indices):
+            width = max(width, int(np.max(indices)) + 1)
+        if sparse:
+            X = csr_matrix((values.astype(dtype), indices, indptr), shape=(len(y), width))
+            X.sum_duplicates()
+        else:
+            X = to_dense(values, indices, indptr, width, dtype)
+        yield X, y
+
+
+def load_libsvm(path, chunk_size=65536, num_features=None, dtype=np.float32, cache_dir=None):
+    """
+    Loads a whole LibSVM file into a dense feature matrix, computing the scaling statistics while streaming.
+    If a cache directory is given, the parsed result is stored there and memory mapped by later calls, as long as the
+    file has not changed.
+    :param path: Path of the file.
+    :(Optional) param chunk_size: Number of lines parsed at a time.
+    :(Optional) param num_features: Number of features, if None the largest index in the file.
+    :(Optional) param dtype: Data type of the features.
+    :(Optional) param cache_dir: Directory for the memory mapped cache.
+    :returns X, y, stats: Feature matrix, class vector and a dictionary with the per feature count, sum, mean, std,
+             min and max.
+    """
+    source = os.stat(path)
+    meta = {'path': os.path.abspath(path), 'size': source.st_size, 'mtime': source.st_mtime,
+            'dtype': np.dtype(dtype).str, 'num_features': num_features}
+    if cache_dir is not None:
+        cached = load_cache(cache_dir, meta)
+        if cached is not None:
+            return cached
+
+    X_blocks, y_blocks = [], []
+    stats = FeatureStats(num_features or 0)
+    for X, y in read_libsvm_chunks(path, chunk_size, num_features, dtype=dtype):
+        stats.resize(X.shape[1])
+        stats.update(X)
+        X_blocks.append(X)
+        y_blocks.append(y)
+    if stats.count == 0:
+        raise ValueError('{} contains no samples'.format(path))
+    # Blocks read before the largest index are narrower, the missing features are 0.
+    X = np.zeros((stats.count, len(stats.sum)), dtype=dtype)
+    start = 0
+    for block in X_blocks:
+        X[start:start+len(block), :block.shape[1]] = block
+        start += len(block)
+    y = np.concatenate(y_blocks)
+    stats = {'count': stats.count, 'sum': stats.sum.tolist(), 'mean': stats.mean.tolist(),
+             'std': stats.std.tolist(), 'min': stats.min.tolist(), 'max': stats.max.tolist()}
+
+    if cache_dir is not None:
+        return save_cache(cache_dir, meta, X, y, stats)
+    return X, y, stats
+
+
+def load_cache(cache_dir, meta):
+    """
+    Loads a parsed file from the cache, memory mapped.
+    :returns: X, y, stats, or None if the cache is missing or stale.
+    """
+    try:
+        with open(os.path.join(cache_dir, 'meta.json')) as f:
+            cached = json.load(f)
+        if cached['source'] != meta:
+            return None
+        X = np.load(os.path.join(cache_dir, 'X.npy'), mmap_mode='r')
+        y = np.load(os.path.join(cache_dir, 'y.npy'), mmap_mode='r')
+    except (OSError, ValueError, KeyError):
+        return None
+    return X, y, cached['stats']
+
+
+def save_cache(cache_dir, meta, X, y, stats):
+    """
+    Saves a parsed file to the cache. The metadata is written last, so a partly written cache is never used.
+    :returns X, y, stats: The cached arrays, memory mapped.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_path = os.path.join(cache_dir, 'meta.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    np.save(os.path.join(cache_dir, 'X.npy'), X)
+    np.save(os.path.join(cache_dir, 'y.npy'), y)
+    with open(meta_path, 'w') as f:
+        json.dump({'source': meta, 'stats': stats}, f)
+    return load_cache(cache_dir, meta)
+
+
+def decode_libsvm(path, chunk_size=65536, cache_dir=None):
+    """
+    Method that decodes data in LibSVM into a scaled matrix of features and a vector of classes.
+    :param path: path of the file.
+    :(Optional) param chunk_size: Number of lines parsed at a time.
+    :(Optional) param cache_dir: Directory for the memory mapped cache of the parsed file.
+    :returns X, y, scale: scaled feature matrix X (first column is the intercept), class vector y, scaling factor.
+    """
+    features, y, stats = load_libsvm(path, chunk_size, dtype=np.float64, cache_dir=cache_dir)
+    # Normalization based on the total number of characters in the books.
+    scale = stats['sum'][0]
+    X = np.empty((len(y), features.shape[1] + 1))
+    X[:, 1:] = features
+    X[:, 1:] /= scale
+    # intercept
+    X[:, 0] = 1
+    return X, np.asarray(y).reshape(-1, 1), scale
+
+
+def write_libsvm(f, X, y):
+    """
+    Writes a block of samples in LibSVM form, only nonzero features are written.
+    :param f: File object opened for writing.
+    :param X: Feature block of shape (samples, features), or any iterable of feature rows.
+    :param y: Labels.
+    """
+    f.writelines('{} {}\n'.format(label, ' '.join('{}:{}'.format(i + 1, value)
+                                                  for i, value in enumerate(obs) if value != 0))
+                 for obs, label in zip(X, y))
+
+
+def encode_two_datasets(DS1, DS2, path='datasets.txt'):
+    """
+    Encodes two datasets (of different classes) into LibSVM form
+    to a textfile called datasets.txt in the current folder. The datasets may be any iterables of
+    observations, e.g. generators, they are written as they are consumed.
+    :(Optional) param path: Path of the file.
+    """
+    with open(path, 'w') as f:
+        f.writelines('{} 1:{} 2:{}\n'.format(1, obs[0], obs[1]) for obs in DS1)
+        f.writelines('{} 1:{} 2:{}\n'.format(0, obs[0], obs[1]) for obs in DS2)
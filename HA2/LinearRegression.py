@@ -0,0 +1,133 @@
+"""
+Solvers for the linear regression in Home Assignment 2 for the course EDAP01 - Artificial Intelligence given at LTH.
+
+All solvers fit weights w minimizing the squared loss |y - X @ w|^2 / 2. The closed form solvers (normal equations and
+QR) are exact, the iterative ones (SGD, batch and minibatch gradient descent) terminate when the norm of the gradient
+of the mean loss, X.T @ (X @ w - y) / num_points, is below epsilon times its norm at w = 0, |X.T @ y| / num_points.
+The criterion is thereby independent of the scaling of the data.
+
+Author Eric Rostedt.
+"""
+
+# Imports
+import numpy as np
+
+VERSIONS = ('SGD', 'batch', 'normal', 'qr')
+
+
+def gradient(X, y, w):
+    """
+    Gradient of the mean squared loss.
+    :param X: Feature matrix X.
+    :param y: Target vector y.
+    :param w: Weights w.
+    :return: Gradient X.T @ (X @ w - y) / num_points.
+    """
+    return X.T @ (X @ w - y) / len(y)
+
+
+def linreg(X, y, w, version='SGD', learning_rate=1, epsilon=1e-4, maxit=10000, suppress_prints=False, seed=None):
+    """
+    Method for finding parameters for linear regression, the iterative versions terminate if the norm of the
+    gradient of the loss evaluated with current weights w is smaller than epsilon times the norm at w = 0.
+    :param X: Feature matrix X, first column is the intercept.
+    :param y: Target vector y.
+    :param w: initial weights w, not used by the closed form versions.
+    :(optional) param version: SGD, batch, normal (normal equations) or qr (least squares by QR decomposition).
+    :(optional) param learning_rate: step length
+    :(optional) param epsilon: termination crit, relative to the norm of the gradient at w = 0
+    :(optional) param maxit: maximum number of iterations
+    :(optional) param suppress_prints: Hides prints if set to true.
+    :(optional) param seed: Seed of the sample shuffling in SGD.
+    :return w: optimal weights w
+    """
+    if version not in VERSIONS:
+        raise ValueError('version must be one of {}, got {!r}'.format(VERSIONS, version))
+    X = np.asarray(X, dtype=float)
+    y = np.ravel(y).astype(float)
+    num_points = len(y)
+    if num_points == 0:
+        raise ValueError('Not enough points. number of points was 0')
+
+    if num_points == 1:
+        if not suppress_prints:
+            print('Only one point, the intercept is set to 0 the slope is calculated thereafter.')
+        return np.array([0, y[0]/X[0, 1]])
+
+    if version == 'normal':
+        return np.linalg.solve(X.T @ X, X.T @ y)
+    if version == 'qr':
+        Q, R = np.linalg.qr(X)
+        return np.linalg.solve(R, Q.T @ y)
+
+    w = np.array(w, dtype=float)
+    rng = np.random.default_rng(seed)
+    tolerance = epsilon * np.linalg.norm(X.T @ y) / num_points
+    converged = False
+    for ep in range(maxit):
+        if version == 'SGD':
+            for update in rng.permutation(num_points):
+                w += learning_rate * (y[update] - X[update] @ w) * X[update]
+            grad_loss = gradient(X, y, w)
+        else:
+            grad_loss = gradient(X, y, w)
+            w -= learning_rate * grad_loss
+        if np.linalg.norm(grad_loss) <= tolerance:
+            if not suppress_prints:
+                print('Terminated at episode:{}'.format(ep+1))
+            converged = True
+            break
+    if not converged and not suppress_prints:
+        print('Termination criterion not meet, code terminated due to too many iterations. Values returned may not be '
+              'optimal.')
+    return w
+
+
+def linreg_minibatch(chunks, w, learning_rate=1, epsilon=1e-4, maxit=10000, batch_size=256, suppress_prints=False,
+                     seed=None):
+    """
+    Minibatch SGD for linear regression, streaming over chunked input such that the dataset never has to be in memory.
+    Terminates if the norm of the gradient accumulated over an epoch is smaller than epsilon times the norm of the
+    gradient at w = 0.
+    :param chunks: Function returning a new iterable of (X, y) chunks for every epoch, e.g.
+                   lambda: read_libsvm_chunks(path, num_features=2).
+    :param w: initial weights w
+    :(optional) param learning_rate: step length
+    :(optional) param epsilon: termination crit, relative to the norm of the gradient at w = 0
+    :(optional) param maxit: maximum number of epochs
+    :(optional) param batch_size: Number of samples per update, chunks are split into batches of this size.
+    :(optional) param suppress_prints: Hides prints if set to true.
+    :(optional) param seed: Seed of the shuffling of the batches within a chunk.
+    :return w: optimal weights w
+    """
+    w = np.array(w, dtype=float)
+    rng = np.random.default_rng(seed)
+    converged = False
+    for ep in range(maxit):
+        # Gradient of the epoch, accumulated with the weights at the time of each batch.
+        grad_sum = np.zeros_like(w)
+        # Gradient at w = 0, up to the sign.
+        target_sum = np.zeros_like(w)
+        num_points = 0
+        for X, y in chunks():
+            X = np.asarray(X, dtype=float)
+            y = np.ravel(y).astype(float)
+            target_sum += X.T @ y
+            order = rng.permutation(len(y))
+            for start in range(0, len(y), batch_size):
+                batch = order[start:start+batch_size]
+                grad = X[batch].T @ (X[batch] @ w - y[batch])
+                grad_sum += grad
+                num_points += len(batch)
+                w -= learning_rate * grad / len(batch)
+        if num_points == 0:
+            raise ValueError('Not enough points. number of points was 0')
+        if np.linalg.norm(grad_sum) <= epsilon * np.linalg.norm(target_sum):
+            if not suppress_prints:
+                print('Terminated at episode:{}'.format(ep+1))
+            converged = True
+            break
+    if not converged and not suppress_prints:
+        print('Termination criterion not meet, code terminated due to too many iterations. Values returned may not be '
+              'optimal.')
+    return w
@@ -0,0 +1,103 @@
+"""
+Benchmark of the linear regression solvers in LinearRegression.py across dataset sizes.
+
+Synthetic datasets in the style of the assignment (number of a's against total words in a book, scaled to at most 1)
+are generated for every size. Every solver is timed and its mean squared error and distance to the exact least
+squares weights are reported, such that the fastest solver reaching a given accuracy can be picked.
+
+Usage: python RegressionBenchmark.py --sizes 1000 100000 1000000 --output results.json
+"""
+
+# Imports
+from LinearRegression import linreg, linreg_minibatch
+import numpy as np
+import argparse
+import json
+import time
+
+
+def make_dataset(num_points, seed=0):
+    """
+    Generates a scaled dataset with an intercept column.
+    :param num_points: Number of points.
+    :(optional) param seed: Seed of the random generator.
+    :return X, y: Feature matrix X and target vector y.
+    """
+    rng = np.random.default_rng(seed)
+    words = rng.uniform(15000, 80000, num_points)
+    a_count = 0.065 * words + rng.normal(0, 100, num_points)
+    scale = max(np.max(words), np.max(a_count))
+    X = np.column_stack((np.ones(num_points), words / scale))
+    return X, a_count / scale
+
+
+def chunked(X, y, chunk_size):
+    """
+    :return: Function returning an iterable of (X, y) chunks, as read from a file in chunks.
+    """
+    return lambda: ((X[start:start+chunk_size], y[start:start+chunk_size]) for start in range(0, len(y), chunk_size))
+
+
+def run_benchmark(sizes, max_sgd_size, maxit, epsilon, seed=0):
+    """
+    Runs every solver on a dataset of every size.
+    :param sizes: Dataset sizes.
+    :param max_sgd_size: Largest size the per sample SGD is run for, it loops over samples in Python.
+    :param maxit: Maximum number of iterations of the iterative solvers.
+    :param epsilon: Termination criterion of the iterative solvers, gradient norm relative to the one at w = 0.
+    :(optional) param seed: Seed of the datasets and shuffling.
+    :return results: List of dictionaries with size, solver, time, mean squared error and weight error.
+    """
+    solvers = {
+        'normal': lambda X, y: linreg(X, y, [0, 0], version='normal'),
+        'qr': lambda X, y: linreg(X, y, [0, 0], version='qr'),
+        'batch': lambda X, y: linreg(X, y, [0, 0], version='batch', learning_rate=1, epsilon=epsilon, maxit=maxit,
+                                     suppress_prints=True),
+        'minibatch': lambda X, y: linreg_minibatch(chunked(X, y, 65536), [0, 0], learning_rate=0.5, epsilon=epsilon,
+                                                   maxit=maxit, batch_size=1024, suppress_prints=True, seed=seed),
+        'SGD': lambda X, y: linreg(X, y, [0, 0], version='SGD', learning_rate=0.01, epsilon=epsilon, maxit=maxit,
+                                   suppress_prints=True, seed=seed),
+    }
+    results = []
+    for size in sizes:
+        X, y = make_dataset(size, seed)
+        w_exact = np.linalg.lstsq(X, y, rcond=None)[0]
+        for name, solver in solvers.items():
+            if name == 'SGD' and size > max_sgd_size:
+                continue
+            start = time.perf_counter()
+            w = solver(X, y)
+            elapsed = time.perf_counter() - start
+            result = {'size': size,
+                      'solver': name,
+                      'time': elapsed,
+                      'mse': float(np.mean((X @ w - y)**2)),
+                      'weight_error': float(np.linalg.norm(w - w_exact))}
+            results.append(result)
+            print('size {size:8d} {solver:>10}: {time:9.4f} s, mse {mse:.3e}, weight error {weight_error:.2e}'
+                  .format(**result))
+    return results
+
+
+def main():
+    """
+    Parses the arguments, runs the benchmark and writes the results.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark of the HA2 linear regression solvers.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000, 1000000])
+    parser.add_argument('--max-sgd-size', type=int, default=10000)
+    parser.add_argument('--maxit', type=int, default=10000)
+    parser.add_argument('--epsilon', type=float, default=1e-4,
+                        help='Termination criterion, gradient norm relative to the one at w = 0.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='JSON file the results are written to.')
+    args = parser.parse_args()
+
+    results = run_benchmark(args.sizes, args.max_sgd_size, args.maxit, args.epsilon, args.seed)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
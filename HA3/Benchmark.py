@@ -0,0 +1,183 @@
+"""
+Benchmark of the self localization in Home Assignment 3 across grid sizes.
+
+For every grid size a world and a model are constructed in a fresh process and the robot is localized for a number of
+steps. Construction time, per step latency percentiles of the forward algorithm, peak resident memory and localization
+accuracy are recorded and written as JSON. Every size is run several times and the best timings and memory are kept.
+If a baseline file exists, the results are compared against it and the script exits with status 1 if some measure
+has regressed by more than the tolerance, ignoring differences below an absolute floor which are noise (20 us per
+step, 1 ms for construction, 5 MB).
+
+Usage: python Benchmark.py --sizes 8 16 32 --steps 500 --output results.json
+       python Benchmark.py --save-baseline
+"""
+
+# Imports
+from HMM import HMM
+from World import World
+import numpy as np
+import random as rnd
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+# Measures where larger is worse, compared relative to the baseline, with the absolute difference below which a change
+# is considered noise (seconds and MB). A step takes from about 10 us on small grids to about 1 ms on 128 x 128, so the
+# latency floor is far below the construction floor.
+TIMED_MEASURES = {'construction_time': 1e-3,
+                  'latency_p50': 2e-5,
+                  'latency_p90': 2e-5,
+                  'latency_p99': 2e-5,
+                  'peak_rss_mb': 5}
+
+
+def peak_rss_mb():
+    """
+    Peak resident memory of the current process.
+    :return: Peak resident memory in MB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is given in bytes on macOS and in kilobytes elsewhere.
+    if sys.platform == 'darwin':
+        return peak / 2**20
+    return peak / 2**10
+
+
+def run_size(size, steps, seed):
+    """
+    Constructs a world and model of a given size and localizes the robot.
+    :param size: Width and height of the world.
+    :param steps: Number of localization steps.
+    :param seed: Seed of the random generators.
+    :return: Dictionary with the measures of the run.
+    """
+    rnd.seed(seed)
+    world = World(size, size, seed=seed)
+
+    start = time.perf_counter()
+    hmm = HMM(world)
+    construction_time = time.perf_counter() - start
+
+    latencies = np.empty(steps)
+    errors = np.empty(steps)
+    for step in range(steps):
+        correct_pos = np.asarray(world.robot.loc)
+        guessed_pos, _, latencies[step] = hmm.step(world.sensor.sensor_reading(world))
+        errors[step] = np.sum(np.abs(correct_pos - np.asarray(guessed_pos)))
+        world.robot.move()
+
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    return {'size': size,
+            'steps': steps,
+            'states': hmm.num_states,
+            'construction_time': construction_time,
+            'latency_p50': p50,
+            'latency_p90': p90,
+            'latency_p99': p99,
+            'latency_max': np.max(latencies),
+            'peak_rss_mb': peak_rss_mb(),
+            'accuracy': np.mean(errors == 0),
+            'average_error': np.mean(errors)}
+
+
+def run_benchmark(sizes, steps, seed=0, repeats=3):
+    """
+    Runs the benchmark for every grid size, each run in a fresh process such that the peak memory belongs to that size.
+    :param sizes: Grid sizes.
+    :param steps: Number of localization steps per size.
+    :param seed: (Optional) Seed of the random generators.
+    :param repeats: (Optional) Number of runs per size, the best timings and memory of them are kept.
+    :return results: List of dictionaries with the measures for each size.
+    """
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for size in sizes:
+        runs = []
+        for _ in range(repeats):
+            with context.Pool(1) as pool:
+                runs.append(pool.apply(run_size, (size, steps, seed)))
+        # The runs are seeded alike, so only the timings and memory differ between them.
+        result = dict(runs[0])
+        for measure in TIMED_MEASURES:
+            result[measure] = min(run[measure] for run in runs)
+        results.append({key: float(value) if isinstance(value, np.floating) else value
+                        for key, value in result.items()})
+        print('size {size:4d}: construction {construction_time:.3f} s, step p50 {latency_p50:.2e} s, '
+              'p99 {latency_p99:.2e} s, peak rss {peak_rss_mb:.1f} MB, accuracy {accuracy:.2f}'.format(**result))
+    return results
+
+
+def compare(results, baseline, tolerance, accuracy_tolerance):
+    """
+    Compares results against a baseline.
+    :param results: Results of the current run.
+    :param baseline: Results of the baseline run.
+    :param tolerance: Tolerated relative increase of the timings and memory, increases below the absolute floor of
+    the measure are always tolerated.
+    :param accuracy_tolerance: Tolerated absolute decrease of the accuracy.
+    :return regressions: List of descriptions of the regressed measures.
+    """
+    baseline = {result['size']: result for result in baseline}
+    regressions = []
+    for result in results:
+        base = baseline.get(result['size'])
+        if base is None:
+            continue
+        for measure, floor in TIMED_MEASURES.items():
+            increase = result[measure] - base[measure]
+            if increase > tolerance * base[measure] and increase > floor:
+                regressions.append('size {}: {} {:.3g} > baseline {:.3g}'.format(
+                    result['size'], measure, result[measure], base[measure]))
+        if result['accuracy'] < base['accuracy'] - accuracy_tolerance:
+            regressions.append('size {}: accuracy {:.3f} < baseline {:.3f}'.format(
+                result['size'], result['accuracy'], base['accuracy']))
+    return regressions
+
+
+def main():
+    """
+    Parses the arguments, runs the benchmark, writes the results and compares them against the baseline.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark of the HA3 self localization across grid sizes.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[8, 16, 32, 64, 128])
+    parser.add_argument('--steps', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeats', type=int, default=3, help='Runs per size, the best timings are kept.')
+    parser.add_argument('--output', default='benchmark_results.json', help='JSON file the results are written to.')
+    parser.add_argument('--baseline', default=BASELINE, help='JSON file with the baseline results.')
+    parser.add_argument('--save-baseline', action='store_true', help='Writes the results as the new baseline.')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Tolerated relative increase of timings and memory.')
+    parser.add_argument('--accuracy-tolerance', type=float, default=0.05,
+                        help='Tolerated absolute decrease of the accuracy.')
+    args = parser.parse_args()
+
+    results = run_benchmark(args.sizes, args.steps, args.seed, args.repeats)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print('Baseline written to {}'.format(args.baseline))
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.accuracy_tolerance)
+        for regression in regressions:
+            print('Regression: {}'.format(regression))
+        if regressions:
+            sys.exit(1)
+        print('No regressions against {}'.format(args.baseline))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,143 +1,132 @@
 # Imports
+import hashlib
+import time
 import numpy as np
+from ModelCache import ModelCache
+
+# Bump when the layout of the model arrays changes, such that old cache entries are not used.
+MODEL_VERSION = 2
+MODEL_ARRAYS = ('transition_rows', 'transition_cols', 'transition_probs', 'no_reading_sensor_vector')
+# Marks a step in a reading stream where no sensor message arrived (as opposed to None, the sensor reporting nothing).
+MISSING = object()
 
 
 class HMM:
     """
     Class which constructs a hidden markov model and predicts the robot location based on the forward algorithm.
     """
-    def __init__(self, world):
+    def __init__(self, world, cache_dir=None, strict=False):
         """
         Initialize the world, the number of headings as well as the transition matrix, no sensor reading matrix and
-        the f vector.
+        the f vector. If a cache directory is given, the model is loaded from there (memory mapped) if it has been
+        constructed before, otherwise it is constructed and saved there.
+        :param world: World which the robot lives in.
+        :param cache_dir: (Optional) Directory of the on-disk model cache.
+        :param strict: (Optional) Raise ValueError on a reading which is not a free cell of the world, instead of
+        treating it as missing.
         """
         self.world = world
+        self.strict = strict
         self.width = world.width
         self.height = world.height
         self.headings = 4
-        self.Transition = self.construct_transition()
-        self.no_reading_sensor_matrix = self.construct_no_reading_sensor_matrix()
-        self.f = (1/(self.height*self.width * self.headings)) * np.ones((self.height*self.width * self.headings, 1))
+        # States are only indexed over the free cells, as cell*headings + heading.
+        self.num_states = world.neighbour_table.num_cells * self.headings
+
+        model = None
+        if cache_dir is not None:
+            cache = ModelCache(cache_dir, self.model_key())
+            model = cache.load(MODEL_ARRAYS)
+            if model is None:
+                model = cache.save(self.construct_model())
+        else:
+            model = self.construct_model()
+
+        # The transition matrix is sparse, it is stored as coordinate triplets (state, new_state, probability).
+        self.transition_rows = model['transition_rows']
+        self.transition_cols = model['transition_cols']
+        self.transition_probs = model['transition_probs']
+        # Sensor matrices are diagonal, only the diagonals are stored.
+        self.no_reading_sensor_vector = model['no_reading_sensor_vector']
+        self.f = (1/self.num_states) * np.ones(self.num_states)
+
+    def model_key(self):
+        """
+        Grants the key of the model in the on-disk cache, a hash of everything the model arrays depend on.
+        :return: Hex digest identifying the model.
+        """
+        sensor = self.world.sensor
+        occupancy = hashlib.sha1(np.packbits(self.world.neighbour_table.free)).hexdigest()
+        params = [MODEL_VERSION, self.width, self.height, occupancy, self.headings,
+                  sensor.p_true_reading, sensor.p_1_off, sensor.p_2_off]
+        return hashlib.sha1(repr(params).encode()).hexdigest()
+
+    def construct_model(self):
+        """
+        Constructs all model arrays.
+        :return: Dictionary with the transition triplets and the no reading sensor vector.
+        """
+        rows, cols, probs = self.construct_transition()
+        return {'transition_rows': rows,
+                'transition_cols': cols,
+                'transition_probs': probs,
+                'no_reading_sensor_vector': self.construct_no_reading_sensor_vector()}
 
     def construct_transition(self):
         """
-        Constructs the transition matrix.
-        :return transition: Transition matrix.
-        """
-        transition = np.zeros((self.height*self.width * self.headings, self.height*self.width * self.headings))
-
-        for x in range(self.width):
-            for y in range(self.height):
-                for heading in range(self.headings):
-                    # Due to the nature of the indexing, this shall grant the current state.
-                    state = x*self.height*self.headings + y*self.headings + heading
-                    moves = self.get_moves(x, y, heading)
-                    for (new_x, new_y, new_heading), p in moves:
-                        new_state = new_x*self.height*self.headings + new_y*self.headings + new_heading
-                        transition[state, new_state] = p
-
-        return transition
-
-    def get_moves(self, x, y, heading):
-        """
-        Helper function to construct_transition. Grants the possible moves that the robot could take given a
-        certain state and heading with corresponding probabilities (based on the given prob from the given task).
-        :param x: x-coordinate.
-        :param y: y-coordinate.
-        :param heading: Heading.
-        return moves: Possible moves for robot at (x, y) with direction=heading with corresponding probabilities.
-        """
-        possible_moves, attempted_move = self.get_possible_moves(x, y, heading)
-        encountered_wall = False
-        if attempted_move not in possible_moves:
-            encountered_wall = True
-        moves = []
-
-        num_moves = len(possible_moves)
-
-        for (new_x, new_y, head) in possible_moves:
-            if head == heading and not encountered_wall:
-                moves.append(((new_x, new_y, head), 0.7))
-            elif head != heading:
-                if encountered_wall:
-                    moves.append(((new_x, new_y, head), 1/num_moves))
-                else:
-                    moves.append(((new_x, new_y, head), 0.3/(num_moves-1)))
-
-        return moves
-
-    def get_possible_moves(self, x, y, heading):
-        """
-        Helper function to get_moves. Grants the possible moves that the robot could take given a certain
-        state and heading
-        :param x: x-coordinate.
-        :param y: y-coordinate.
-        :param heading: Heading.
-        return moves, attempted_move: Possible moves for robot at (x, y) with direction=heading as well as the
-        attempted move (used for bayesian calculation if the robot encounters wall or not).
-        """
-        possible_moves = [(x, y+1, 0), (x+1, y, 1), (x, y-1, 2), (x-1, y, 3)]
-        moves = []
-        for (new_x, new_y, head) in possible_moves:
-            if self.inside(new_x, new_y):
-                moves.append((new_x, new_y, head))
-        attempted_move = possible_moves[heading]
-        return moves, attempted_move
-
-    def inside(self, x, y):
-        """
-        Function which checks if coordinate (x, y) is inside the world.
-        :param x: x-coordinate.
-        :param y: y-coordinate.
-        :return: True if the coordinate is inside the world, False else.
-        """
-        if (0 <= x <= self.width - 1) and (0 <= y <= self.height - 1):
-            return True
-        return False
+        Constructs the transition matrix in sparse form, over the states of the free cells. The robot keeps its
+        heading with probability 0.7 and turns to one of the other possible headings otherwise. If it encounters a
+        wall or an obstacle, it turns to one of the possible headings with equal probability.
+        :return rows, cols, probs: Current states, new states and the corresponding transition probabilities.
+        """
+        table = self.world.neighbour_table
+        # Axes are (cell, heading, new_heading), a new heading is possible if the step along it is not blocked.
+        possible = np.broadcast_to(table.valid_headings[:, None, :], (table.num_cells, self.headings, self.headings))
+        encountered_wall = ~table.valid_headings[:, :, None]
+        same_heading = np.eye(self.headings, dtype=bool)[None]
+        num_moves = np.sum(table.valid_headings, axis=1)[:, None, None]
 
-    def construct_sensor_matrix(self, sensor_reading):
+        with np.errstate(divide='ignore'):
+            p = np.where(encountered_wall, 1/num_moves,
+                         np.where(same_heading, np.where(num_moves == 1, 1.0, 0.7), 0.3/(num_moves - 1)))
+
+        cell, heading, new_heading = np.nonzero(possible)
+        rows = cell*self.headings + heading
+        cols = table.heading_cells[cell, new_heading]*self.headings + new_heading
+        return rows.astype(np.int64), cols.astype(np.int64), p[cell, heading, new_heading]
+
+    def construct_sensor_vector(self, sensor_reading):
         """
-        Constructs the sensor matrix given some sensor reading. If sensor reading is None, it returns the no sensor
-        reading matrix.
+        Constructs the diagonal of the sensor matrix given some sensor reading. If sensor reading is None, it returns
+        the diagonal of the no sensor reading matrix.
         :param sensor_reading: Sensor_reading, either a coordinate or None.
-        :return Om: sensor matrix Om.
+        :return O: Diagonal of sensor matrix Om.
         """
         if not sensor_reading:
-            return self.no_reading_sensor_matrix
-        Om = np.zeros((self.width*self.height * self.headings, self.width*self.height * self.headings))
+            return self.no_reading_sensor_vector
+        table = self.world.neighbour_table
+        # One row per cell, one column per heading, which is the state ordering of f.
+        O = np.zeros((table.num_cells, self.headings))
 
         [x, y] = sensor_reading
-        state = x*self.height*self.headings + y*self.headings
-
-        for heading in range(self.headings):
-            Om[state + heading, state + heading] = self.world.sensor.p_true_reading
+        # The neighbours of the reading, not of the robot, whose location is unknown to the model.
+        cell = table.get_cell(x, y)
+        if cell < 0:
+            raise ValueError('Sensor reading {} is not a free cell of the world.'.format(sensor_reading))
+        O[cell] = self.world.sensor.p_true_reading
+        O[table.neighbour_cells[cell, :table.num_neighbours[cell]]] = self.world.sensor.p_1_off
+        O[table.second_neighbour_cells[cell, :table.num_second_neighbours[cell]]] = self.world.sensor.p_2_off
+        return O.ravel()
 
-        for (n_x, n_y) in self.world.robot.neighbours:
-            state = n_x*self.height*self.headings + n_y * self.headings
-            for heading in range(self.headings):
-                Om[state + heading, state + heading] = self.world.sensor.p_1_off
-
-        for (n_x, n_y) in self.world.robot.second_neighbours:
-            state = n_x*self.height*self.headings + n_y * self.headings
-            for heading in range(self.headings):
-                Om[state + heading, state + heading] = self.world.sensor.p_2_off
-        return Om
-
-    def construct_no_reading_sensor_matrix(self):
+    def construct_no_reading_sensor_vector(self):
         """
-        Constructs the no reading sensor matrix. Diagonal matrix with probabilities dependent on number of neighbours
+        Constructs the diagonal of the no reading sensor matrix. Probabilities are dependent on number of neighbours
         and second neighbours, i.e If a the sensor has no reading, then the robot is probably near a corner/wall.
-        :return Om: No reading sensor matrix Om.
+        :return O: Diagonal of no reading sensor matrix Om.
         """
-        Om = np.zeros((self.height * self.width * self.headings, self.height*self.width * self.headings))
-        for state in range(self.height*self.width * self.headings):
-            x = (state // self.headings) // self.height
-            y = (state // self.headings) % self.height
-
-            neighbours, second_neighbours = self.world.robot.get_neighbours(x, y)
-
-            Om[state, state] = 1.0 - self.world.sensor.p_true_reading - self.world.sensor.p_1_off*len(neighbours) - self.world.sensor.p_2_off*len(second_neighbours)
-        return Om
+        table = self.world.neighbour_table
+        O = 1.0 - self.world.sensor.p_true_reading - self.world.sensor.p_1_off*table.num_neighbours - self.world.sensor.p_2_off*table.num_second_neighbours
+        return np.repeat(O, self.headings)
 
     def guess_pos(self):
         """
@@ -149,23 +138,153 @@ class HMM:
         guess, _ = self.get_most_probable()
         return guess
 
+    def localize(self, readings):
+        """
+        Runs the forward algorithm as a pipeline stage over a stream of sensor readings, e.g. from a file, a socket or
+        the simulator. Readings are pulled one at a time, so the source is never read ahead of the consumer. An item
+        equal to MISSING means that no reading arrived for that step, then only the prediction step is made. Glitched
+        readings do not end the stream, see step.
+        :param readings: Iterable of sensor readings (coordinate, None or MISSING).
+        :return: Generator of (estimate, probability, step_latency) for every step, latency in seconds.
+        """
+        for sensor_reading in readings:
+            yield self.step(sensor_reading)
+
+    async def alocalize(self, readings):
+        """
+        Asynchronous version of localize, for readings which arrive on an async stream.
+        :param readings: Async iterable of sensor readings (coordinate, None or MISSING).
+        :return: Async generator of (estimate, probability, step_latency) for every step, latency in seconds.
+        """
+        async for sensor_reading in readings:
+            yield self.step(sensor_reading)
+
+    def step(self, sensor_reading):
+        """
+        Makes one step of the forward algorithm and decodes the most probable position. A reading outside the world or
+        on an obstacle is treated as missing, unless the model is strict.
+        :param sensor_reading: Given sensor reading (coordinate, None or MISSING).
+        :return estimate, probability, step_latency: Best guess of robots location, its probability and the time the
+        step took in seconds.
+        """
+        start = time.perf_counter()
+        if sensor_reading and not self.strict and not self.is_free_cell(sensor_reading):
+            sensor_reading = MISSING
+        if sensor_reading is MISSING:
+            self.predict_f()
+        else:
+            self.update_f(sensor_reading)
+        estimate, probability = self.get_most_probable()
+        return estimate, probability, time.perf_counter() - start
+
+    def is_free_cell(self, sensor_reading):
+        """
+        :param sensor_reading: Given sensor reading, a coordinate or MISSING.
+        :return: True if the reading is a coordinate of a free cell of the world.
+        """
+        if sensor_reading is MISSING:
+            return True
+        [x, y] = sensor_reading
+        return self.world.neighbour_table.get_cell(x, y) >= 0
+
     def update_f(self, sensor_reading):
         """
         Updates f vector based on the forward algorithm.
         :param sensor_reading: Given sensor reading (coordinate or None).
         """
-        Om = self.construct_sensor_matrix(sensor_reading)
-        f = Om @ self.Transition.T @ self.f
-        self.f = f
+        self.predict_f()
+        self.observe_f(sensor_reading)
+
+    def predict_f(self):
+        """
+        Prediction step of the forward algorithm, f = Transition.T @ f. Used alone when a reading is missing.
+        """
+        # Sum the probability flowing into every new state.
+        self.f = np.bincount(self.transition_cols, weights=self.transition_probs * self.f[self.transition_rows],
+                             minlength=self.num_states)
+
+    def observe_f(self, sensor_reading):
+        """
+        Update step of the forward algorithm, f = Om @ f. f is normalized, such that long runs do not underflow.
+        If the reading is impossible under the current belief (f becomes all zeros), the belief is reset to the
+        uniform prior before the reading is applied, instead of turning into NaN for the rest of the run.
+        :param sensor_reading: Given sensor reading (coordinate or None).
+        """
+        O = self.construct_sensor_vector(sensor_reading)
+        f = O * self.f
+        total = np.sum(f)
+        if total <= 0:
+            f = O
+            total = np.sum(f)
+        self.f = f / total
 
     def get_most_probable(self):
         """
         Finds element in f which is largest, then finds which coordinate (x,y) that corresponds to.
-        :return (x, y), self.f[pos]: coordinate for most probable location (x, y) and value at that position.
+        :return (x, y), self.f[pos]: coordinate for most probable location (x, y) and probability of that state.
         """
         pos = np.argmax(self.f)
-
-        x = (pos // self.headings) // self.height
-        y = (pos // self.headings) % self.height
+        x, y = self.world.neighbour_table.coords[pos // self.headings]
 
         return (x, y), self.f[pos]
+
+    def get_cell_belief(self):
+        """
+        Grants the belief of every free cell, f marginalized over the headings.
+        :return: Probability of each free cell, in the order of the compact cell index.
+        """
+        return np.sum(self.f.reshape(-1, self.headings), axis=1)
+
+    def get_belief_map(self):
+        """
+        Grants the belief of every position, f marginalized over the headings. Obstacles have probability 0.
+        :return: Probability of each position, array of shape (width, height) indexed as [x, y].
+        """
+        belief = np.zeros((self.width, self.height))
+        belief.ravel()[self.world.neighbour_table.free_cells] = self.get_cell_belief()
+        return belief
+
+    def get_top_k(self, k):
+        """
+        Finds the k most probable positions.
+        :param k: Number of positions.
+        :return coords, probs: Coordinates of shape (k, 2) and their probabilities, most probable first. k is clamped
+        to the number of free cells, for k <= 0 both arrays are empty.
+        """
+        belief = self.get_cell_belief()
+        k = max(0, min(k, belief.size))
+        if k == 0:
+            return np.empty((0, 2), dtype=int), np.empty(0)
+        cells = np.argpartition(belief, belief.size - k)[belief.size - k:]
+        cells = cells[np.argsort(belief[cells])[::-1]]
+        return self.world.neighbour_table.coords[cells], belief[cells]
+
+    def get_entropy(self):
+        """
+        Entropy of the position belief, 0 if the position is certain and log(number of free cells) if it is unknown.
+        :return: Entropy in nats.
+        """
+        belief = self.get_cell_belief()
+        belief = belief[belief > 0]
+        return -np.sum(belief * np.log(belief))
+
+
+def read_readings(lines):
+    """
+    Parses a text stream of sensor readings, e.g. a file or a socket file object, one reading per line. A line 'x y'
+    is a coordinate, 'none' is the sensor reporting nothing and an empty or garbled line is a missing reading.
+    :param lines: Iterable of lines.
+    :return: Generator of sensor readings (coordinate, None or MISSING).
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            yield MISSING
+        elif line.lower() == 'none':
+            yield None
+        else:
+            try:
+                x, y = line.split()
+                yield int(x), int(y)
+            except ValueError:
+                yield MISSING
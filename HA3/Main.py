@@ -7,7 +7,9 @@ The code is split up into 4 classes spread out over 4 files. HMM.py contains the
 contains the hidden markov model for the prediction. World.py has the class World which constructs a world object.
 Robot.py has two classes:  Robot constructs a Robot and moves the robot. Sensor creates a sensor object which grants the
 sensor readings. Lastly Main.py runs the self localization algorithm, counts how accurate the predictions are and plots
-number of occurrences for each tile in the world.
+number of occurrences for each tile in the world. A map with obstacles can be given as argument, and the belief of
+every step can be recorded to a .npy file for later visualization (read back with Recorder.load_beliefs), e.g.
+python Main.py maps/rooms.txt --beliefs beliefs.npy
 
 Author Eric Rostedt.
 """
@@ -15,57 +17,79 @@ Author Eric Rostedt.
 # Imports
 from HMM import HMM
 from World import World
+from Recorder import BeliefRecorder
 import numpy as np
 import matplotlib.pyplot as plt
-import random as rnd
+import argparse
+import os
 
+# Directory of the on-disk cache for the model matrices of the HMM.
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model_cache')
 
-def run_localization():
+
+def run_localization(map_path=None, belief_path=None):
     """
     Runs the algorithm. Creates a world with a robot and a sensor inside and a model. Calculates average manhattan
     distance of the predicted position and the actual position and the ratio of correctly guessed positions.
-    Lastly displays the number of occurrences for each tile.
+    Positions are recorded into preallocated arrays. Lastly displays the number of occurrences for each tile.
+    :param map_path: (Optional) Path of a map file with obstacles, if None the world is an empty 8x8 grid.
+    :param belief_path: (Optional) Path of a .npy file (memory mapped) which the belief map of every step is recorded
+    to, if None no beliefs are recorded.
     """
-    width, height = 8, 8
     steps = 100
 
-    world = World(width, height)
-    hmm = HMM(world)
-    plot_world = np.zeros((width, height))
-    correct_guesses = 0
-    correct_guesses_random = 0
+    if map_path is None:
+        world = World(8, 8)
+    else:
+        world = World.from_file(map_path)
+    width, height = world.width, world.height
+    hmm = HMM(world, cache_dir=CACHE_DIR)
+    recorder = None
+    if belief_path is not None:
+        recorder = BeliefRecorder(steps, width, height, path=belief_path)
+    correct_pos = np.empty((steps, 2), dtype=int)
+    guessed_pos = np.empty((steps, 2), dtype=int)
 
-    error = 0
-    error_random = 0
     for step in range(steps):
-        guessed_pos = hmm.guess_pos()
+        guessed_pos[step] = hmm.guess_pos()
+        # The guess is based on a reading of the current location, so compare before moving the robot.
+        correct_pos[step] = world.robot.loc
+        if recorder is not None:
+            recorder.record(hmm.get_belief_map())
         world.robot.move()
-        correct_pos = world.robot.loc
-        random_guess = (rnd.randint(0, width-1), rnd.randint(0, height-1))
-        plot_world[correct_pos[0], correct_pos[1]] += 1
-        error += np.linalg.norm(np.asarray(correct_pos) - np.asarray(guessed_pos), 1)
-        error_random += np.linalg.norm(np.asarray(correct_pos) - np.asarray(random_guess), 1)
 
-        if correct_pos == guessed_pos:
-            correct_guesses += 1
+    if recorder is not None:
+        recorder.flush()
 
-        if correct_pos == random_guess:
-            correct_guesses_random += 1
+    random_guess = np.column_stack((np.random.randint(0, width, steps), np.random.randint(0, height, steps)))
+    error = np.sum(np.abs(correct_pos - guessed_pos))
+    error_random = np.sum(np.abs(correct_pos - random_guess))
+    correct_guesses = np.sum(np.all(correct_pos == guessed_pos, axis=1))
+    correct_guesses_random = np.sum(np.all(correct_pos == random_guess, axis=1))
 
     print('Average error: {} \n'. format(error/steps))
     print('Correct guessed: {} \n'.format(correct_guesses/steps))
 
     print('Average error for random guess: {} \n'.format(error_random / steps))
     print('Correct guessed for random guess: {} \n'.format(correct_guesses_random / steps))
+    print('Final belief entropy: {} \n'.format(hmm.get_entropy()))
+
+    plot_world = np.zeros((width, height))
+    np.add.at(plot_world, (correct_pos[:, 0], correct_pos[:, 1]), 1)
 
     fig, ax = plt.subplots()
-    ax.matshow(plot_world)
+    # Rows of the plot are y-coordinates and columns x-coordinates.
+    ax.matshow(plot_world.T)
 
     for x in range(width):
         for y in range(height):
-            ax.text(x, y, str(int(plot_world[y, x])), ha='center', va='center')
+            ax.text(x, y, str(int(plot_world[x, y])), ha='center', va='center')
     plt.show()
 
 
 if __name__ == '__main__':
-    run_localization()
+    parser = argparse.ArgumentParser(description='Self localization of a robot with a hidden markov model.')
+    parser.add_argument('map', nargs='?', help='Map file with obstacles, an empty 8x8 grid if not given.')
+    parser.add_argument('--beliefs', help='.npy file which the belief map of every step is recorded to.')
+    args = parser.parse_args()
+    run_localization(args.map, args.beliefs)
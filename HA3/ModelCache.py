@@ -0,0 +1,50 @@
+# Imports
+import os
+import numpy as np
+
+
+class ModelCache:
+    """
+    On-disk cache for the model arrays of a hidden markov model. Every array is stored as its own .npy file in a
+    directory named after a key, so later runs can memory map the arrays instead of constructing them again.
+    """
+    def __init__(self, cache_dir, key):
+        """
+        Initialize the directory of the cache entry.
+        :param cache_dir: Directory where all cache entries are stored.
+        :param key: Key which identifies the model, used as the name of the cache entry.
+        """
+        self.path = os.path.join(cache_dir, key)
+
+    def file(self, name):
+        """
+        Grants the path of the file which stores a certain array.
+        :param name: Name of the array.
+        :return: Path of the .npy file.
+        """
+        return os.path.join(self.path, name + '.npy')
+
+    def load(self, names):
+        """
+        Loads the arrays of the cache entry as read only memory maps, which lets concurrent processes share pages.
+        :param names: Names of the arrays.
+        :return arrays: Dictionary with the arrays, None if some array is missing or unreadable.
+        """
+        try:
+            return {name: np.load(self.file(name), mmap_mode='r') for name in names}
+        except (OSError, ValueError):
+            return None
+
+    def save(self, arrays):
+        """
+        Saves arrays to the cache entry. Every file is written to a temporary file first and then renamed, such that
+        a concurrent reader never sees a half written array.
+        :param arrays: Dictionary with the arrays.
+        :return arrays: The saved arrays, memory mapped from the cache entry.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        for name, array in arrays.items():
+            tmp = os.path.join(self.path, '{}.{}.tmp.npy'.format(name, os.getpid()))
+            np.save(tmp, np.ascontiguousarray(array))
+            os.replace(tmp, self.file(name))
+        return self.load(arrays.keys())
@@ -0,0 +1,101 @@
+# Imports
+import numpy as np
+
+# Offsets (dx, dy) of the neighbours and second neighbours of a cell, the rings at distance 1 and 2.
+NEIGHBOUR_OFFSETS = np.array([(d_x, d_y) for d_x in range(-1, 2) for d_y in range(-1, 2)
+                              if max(abs(d_x), abs(d_y)) == 1])
+SECOND_NEIGHBOUR_OFFSETS = np.array([(d_x, d_y) for d_x in range(-2, 3) for d_y in range(-2, 3)
+                                     if max(abs(d_x), abs(d_y)) == 2])
+# Offsets (dx, dy) of a step along each heading.
+HEADING_OFFSETS = np.array([(0, 1), (1, 0), (0, -1), (-1, 0)])
+
+
+class NeighbourTable:
+    """
+    Precomputed neighbours, second neighbours and valid headings for every free cell of a world, shared by the robot,
+    the sensor and the hidden markov model. Only free cells are indexed, through a compact index map from the grid
+    index x*height + y, so the size of the tables scales with the free space. The neighbours of a cell are packed such
+    that the valid ones come first, so the valid neighbours of a cell are the first num_neighbours entries of its row.
+    """
+    def __init__(self, world):
+        """
+        Constructs the tables.
+        :param world: World which the tables are for, an occupancy grid (numpy array) where nonzero is an obstacle.
+        """
+        self.height, self.width = np.shape(world)
+        # Occupancy indexed as [x, y], like the grid index.
+        self.free = (np.asarray(world) == 0).T
+        self.free_cells = np.flatnonzero(self.free)
+        self.num_cells = len(self.free_cells)
+        self.cell_index = np.full(self.width * self.height, -1)
+        self.cell_index[self.free_cells] = np.arange(self.num_cells)
+        x, y = np.divmod(self.free_cells, self.height)
+        self.coords = np.stack((x, y), axis=1)
+
+        self.neighbours, self.neighbour_mask = self.construct_ring(NEIGHBOUR_OFFSETS)
+        self.second_neighbours, self.second_neighbour_mask = self.construct_ring(SECOND_NEIGHBOUR_OFFSETS)
+        self.num_neighbours = np.sum(self.neighbour_mask, axis=1)
+        self.num_second_neighbours = np.sum(self.second_neighbour_mask, axis=1)
+        self.neighbour_cells = self.cell(self.neighbours[..., 0], self.neighbours[..., 1])
+        self.second_neighbour_cells = self.cell(self.second_neighbours[..., 0], self.second_neighbours[..., 1])
+
+        heading_coords, self.valid_headings = self.construct_ring(HEADING_OFFSETS, pack=False)
+        # Cell reached by a step along each heading, -1 if the step is blocked.
+        self.heading_cells = self.cell(heading_coords[..., 0], heading_coords[..., 1])
+
+    def construct_ring(self, offsets, pack=True):
+        """
+        Constructs the coordinates of the cells at given offsets from every cell, together with a validity mask.
+        :param offsets: Offsets (dx, dy), shape (k, 2).
+        :param pack: (Optional) Moves the valid cells first in every row, keeping their order.
+        :return coords, mask: Coordinates of shape (num_cells, k, 2) and validity mask of shape (num_cells, k).
+        """
+        coords = self.coords[:, None, :] + offsets[None, :, :]
+        mask = self.inside(coords[..., 0], coords[..., 1])
+        if pack:
+            order = np.argsort(~mask, axis=1, kind='stable')
+            coords = np.take_along_axis(coords, order[..., None], axis=1)
+            mask = np.take_along_axis(mask, order, axis=1)
+        return coords, mask
+
+    def inside(self, x, y):
+        """
+        Checks (elementwise) if coordinates are free cells inside the world.
+        :param x: x-coordinates.
+        :param y: y-coordinates.
+        :return: Boolean array, True where inside the world and free.
+        """
+        inside = (0 <= x) & (x <= self.width - 1) & (0 <= y) & (y <= self.height - 1)
+        return inside & self.free[np.clip(x, 0, self.width - 1), np.clip(y, 0, self.height - 1)]
+
+    def cell(self, x, y):
+        """
+        Grants the (elementwise) compact cell index of coordinates.
+        :param x: x-coordinate.
+        :param y: y-coordinate.
+        :return: Cell index, -1 if the coordinate is an obstacle or outside the world.
+        """
+        return np.where(self.inside(x, y), self.cell_index[np.clip(x, 0, self.width - 1)*self.height
+                                                           + np.clip(y, 0, self.height - 1)], -1)
+
+    def get_cell(self, x, y):
+        """
+        Grants the compact cell index of a single coordinate, cheaper than cell for scalars.
+        :param x: x-coordinate.
+        :param y: y-coordinate.
+        :return: Cell index, -1 if the coordinate is an obstacle or outside the world.
+        """
+        if 0 <= x <= self.width - 1 and 0 <= y <= self.height - 1:
+            return self.cell_index[x*self.height + y]
+        return -1
+
+    def get_neighbours(self, x, y):
+        """
+        Grants the valid neighbours and second neighbours of a coordinate as views into the tables.
+        :param x: x-coordinate.
+        :param y: y-coordinate.
+        :return neighbours, second_neighbours: Arrays of coordinates, shapes (n, 2) and (m, 2).
+        """
+        cell = self.get_cell(x, y)
+        return (self.neighbours[cell, :self.num_neighbours[cell]],
+                self.second_neighbours[cell, :self.num_second_neighbours[cell]])
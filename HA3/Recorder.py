@@ -0,0 +1,83 @@
+# Imports
+import numpy as np
+
+
+def steps_path(path):
+    """
+    :param path: Path of the .npy file of a belief recording.
+    :return: Path of the .npy file with the step index of every slot, next to it.
+    """
+    return (path[:-len('.npy')] if path.endswith('.npy') else path) + '.steps.npy'
+
+
+class BeliefRecorder:
+    """
+    Records belief maps into a preallocated ring buffer, optionally backed by a memory mapped .npy file, such that
+    long runs can be visualized afterwards. When the buffer is full the oldest beliefs are overwritten. The step index
+    of every slot is stored next to the beliefs (in a .steps.npy file if backed by a file), such that the order of a
+    wrapped buffer can be recovered, see load_beliefs.
+    """
+    def __init__(self, capacity, width, height, path=None, dtype=np.float32):
+        """
+        Initialize the buffer.
+        :param capacity: Number of beliefs the buffer holds.
+        :param width: World width.
+        :param height: World height.
+        :param path: (Optional) Path of a .npy file backing the buffer, if None the buffer is kept in memory. The step
+        indices are written to the path with .steps.npy instead of .npy.
+        :param dtype: (Optional) Data type of the stored beliefs.
+        """
+        shape = (capacity, width, height)
+        if path is None:
+            self.buffer = np.empty(shape, dtype=dtype)
+            self.steps = np.empty(capacity, dtype=np.int64)
+        else:
+            self.buffer = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+            self.steps = np.lib.format.open_memmap(steps_path(path), mode='w+', dtype=np.int64, shape=(capacity,))
+        # Step index recorded in every slot, -1 for slots which have not been written.
+        self.steps[:] = -1
+        self.capacity = capacity
+        self.count = 0
+
+    def record(self, belief):
+        """
+        Stores a belief map in the next slot of the buffer.
+        :param belief: Belief map of shape (width, height).
+        """
+        slot = self.count % self.capacity
+        self.buffer[slot] = belief
+        self.steps[slot] = self.count
+        self.count += 1
+
+    def beliefs(self):
+        """
+        Grants the recorded beliefs, oldest first. A view of the buffer unless it has wrapped around.
+        :return: Array of shape (recorded, width, height).
+        """
+        if self.count <= self.capacity:
+            return self.buffer[:self.count]
+        start = self.count % self.capacity
+        return np.concatenate((self.buffer[start:], self.buffer[:start]))
+
+    def flush(self):
+        """
+        Writes the buffer and the step indices to their files, if they are memory mapped.
+        """
+        if isinstance(self.buffer, np.memmap):
+            self.buffer.flush()
+            self.steps.flush()
+
+
+def load_beliefs(path):
+    """
+    Loads a recording written by a file backed BeliefRecorder, memory mapped if the buffer has not wrapped around.
+    :param path: Path of the .npy file of the beliefs.
+    :return steps, beliefs: Step index of every recorded belief and the beliefs, oldest first.
+    """
+    beliefs = np.load(path, mmap_mode='r')
+    steps = np.load(steps_path(path))
+    order = np.argsort(steps)
+    order = order[steps[order] >= 0]
+    if np.array_equal(order, np.arange(len(order))):
+        return steps[:len(order)], beliefs[:len(order)]
+    return steps[order], beliefs[order]
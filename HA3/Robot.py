@@ -7,15 +7,34 @@ class Sensor:
     """
     Creates a sensor object which grants the sensor readings based on given probabilities.
     """
-    def __init__(self, world):
+    def __init__(self, world, batch_size=1024, seed=None):
         """
         Initialize parameters based on given probabilities.
         :param world: Needs a world which it lives in. (numpy array).
+        :param batch_size: (Optional) Number of readings to draw random numbers for at once.
+        :param seed: (Optional) Seed of the random generator.
         """
         self.world = world
         self.p_true_reading = 0.1
         self.p_1_off = 0.05
         self.p_2_off = 0.025
+        self.rng = np.random.default_rng(seed)
+        self.batch_size = batch_size
+        self.draws = np.empty((0, 3))
+        self.draw_idx = 0
+
+    def draw(self):
+        """
+        Grants three uniform random numbers for one reading. They are drawn in one vectorized batch for batch_size
+        readings at a time.
+        :return u, r_1, r_2: Random number picking the kind of reading, a neighbour and a second neighbour.
+        """
+        if self.draw_idx == len(self.draws):
+            self.draws = self.rng.random((self.batch_size, 3))
+            self.draw_idx = 0
+        u, r_1, r_2 = self.draws[self.draw_idx]
+        self.draw_idx += 1
+        return u, r_1, r_2
 
     def sensor_reading(self, world):
         """
@@ -24,14 +43,16 @@ class Sensor:
         :return: Sensor reading based on given information. May return true location, neighbour location,
         second neighbour location or no information.
         """
-        u = rnd.random()
-        picked_neighbour = world.pick_rnd_neighbours()
+        u, r_1, r_2 = self.draw()
+        neighbours, second_neighbours = world.robot.neighbours, world.robot.second_neighbours
+        p_1 = self.p_1_off*len(neighbours)
+        p_2 = self.p_2_off*len(second_neighbours)
         if u < self.p_true_reading:
             return world.robot.loc
-        elif u < self.p_true_reading + self.p_1_off*len(world.robot.neighbours):
-            return picked_neighbour[0]
-        elif u < self.p_true_reading + self.p_1_off*len(world.robot.neighbours) + self.p_2_off*len(world.robot.second_neighbours):
-            return picked_neighbour[1]
+        elif u < self.p_true_reading + p_1:
+            return tuple(neighbours[int(r_1*len(neighbours))].tolist())
+        elif u < self.p_true_reading + p_1 + p_2:
+            return tuple(second_neighbours[int(r_2*len(second_neighbours))].tolist())
         else:
             return None
 
@@ -42,14 +63,16 @@ class Robot:
     its neighbours.
     """
 
-    def __init__(self, world):
+    def __init__(self, world, neighbour_table):
         """
-        Initialize starting location, heading and neighbours.
+        Initialize starting location (a random free cell), heading and neighbours.
         :param world: Needs world which the robot lives in.
+        :param neighbour_table: Precomputed neighbours and valid headings of the world.
         """
         self.world = world
+        self.neighbour_table = neighbour_table
         self.height, self.width = np.shape(world)
-        self.loc = [rnd.choice(np.arange(self.width)), rnd.choice(np.arange(self.height))]
+        self.loc = list(rnd.choice(neighbour_table.coords))
         self.heading = self.valid_random_heading()
         self.neighbours, self.second_neighbours = self.get_neighbours(self.loc[0], self.loc[1])
 
@@ -57,7 +80,7 @@ class Robot:
         """
         Moves the robot. The robot has a 30 % chance of randomly changing heading. It will also change heading if it
         cannot move along its current heading. Otherwise the robot simply moves on step ahead. New neighbours are
-        calculated.
+        looked up.
         """
         if rnd.random() < 0.3 or self.invalid_heading(self.heading):
             self.heading = self.valid_random_heading()
@@ -70,64 +93,22 @@ class Robot:
         """
         Function which set a new random heading to the robot. The heading is guaranteed to be valid.
         """
-        headings = np.arange(4)
-        rnd.shuffle(headings)
-        for heading in headings:
-            if not self.invalid_heading(heading):
-                return heading
+        cell = self.neighbour_table.get_cell(self.loc[0], self.loc[1])
+        return rnd.choice(np.flatnonzero(self.neighbour_table.valid_headings[cell]))
 
     def invalid_heading(self, heading):
         """
-        Helper function to valid_random_heading. Checks if the robot is directly staring at a wall. Returns True if so,
-        False else.
-        """
-        valid = 0
-        if heading == 0 and self.loc[1] == self.height - 1:
-            valid += 1
-        elif heading == 1 and self.loc[0] == self.width - 1:
-            valid += 1
-        elif heading == 2 and self.loc[1] == 0:
-            valid += 1
-        elif heading == 3 and self.loc[0] == 0:
-            valid += 1
-        return bool(valid)
+        Helper function to valid_random_heading. Checks if the robot is directly staring at a wall or an obstacle.
+        Returns True if so, False else.
+        """
+        cell = self.neighbour_table.get_cell(self.loc[0], self.loc[1])
+        return not self.neighbour_table.valid_headings[cell, heading]
 
     def get_neighbours(self, x, y):
         """
         Finds all neighbouring points and second neighbouring points.
         :param x: x-coordinate
         :param y: y-coordinate
-        :return  neighbours, second_neighbours: Neighbours and second neighbours.
-        """
-        possible_neighbours = [(n_x, n_y) for n_x in range(x - 1, x + 2) for n_y in range(y - 1, y + 2)]
-        possible_neighbours.remove((x, y))
-
-        possible_second_neighbours = [(n_x, n_y) for n_x in range(x - 2, x + 3) for n_y in range(y - 2, y + 3)]
-        for neighbour in possible_neighbours:
-            possible_second_neighbours.remove(neighbour)
-
-        possible_second_neighbours.remove((x, y))
-
-        neighbours = []
-        second_neighbours = []
-
-        for (n_x, n_y) in possible_neighbours:
-            if self.inside(n_x, n_y):
-                neighbours.append((n_x, n_y))
-
-        for (n_x, n_y) in possible_second_neighbours:
-            if self.inside(n_x, n_y):
-                second_neighbours.append((n_x, n_y))
-
-        return neighbours, second_neighbours
-
-    def inside(self, x, y):
-        """
-        Checks if a coordinate is inside the world.
-        :param x: x-coordinate
-        :param y: y-coordinate
-        :return: True if inside the world, False else.
+        :return  neighbours, second_neighbours: Neighbours and second neighbours, arrays of coordinates.
         """
-        if (0 <= x <= self.width - 1) and (0 <= y <= self.height - 1):
-            return True
-        return False
+        return self.neighbour_table.get_neighbours(x, y)
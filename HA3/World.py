@@ -1,28 +1,67 @@
 # Imports
 from Robot import Robot, Sensor
+from Neighbours import NeighbourTable
 import numpy as np
-from random import choice
 
 
 class World:
     """
-    Constructs world object with certain width and height. World has both a robot and a sensor inside.
+    Constructs world object with certain width and height. World has both a robot and a sensor inside. The world may
+    contain obstacles, given as an occupancy grid.
     """
-    def __init__(self, width, height):
+    def __init__(self, width, height, seed=None, occupancy=None):
         """
-        Initialize world size and world. Lastly a robot and sensor is created in the world.
+        Initialize world size, world and its neighbour tables. Lastly a robot and sensor is created in the world.
         :param width: World width
         :param height: World height
+        :param seed: (Optional) Seed of the sensor's random generator.
+        :param occupancy: (Optional) Occupancy grid of shape (height, width), nonzero cells are obstacles. If None the
+        world is empty.
         """
         self.width = width
         self.height = height
-        self.world = np.zeros((height, width))
-        self.robot = Robot(self.world)
-        self.sensor = Sensor(self.world)
+        if occupancy is None:
+            self.world = np.zeros((height, width))
+        else:
+            self.world = np.asarray(occupancy)
+            if self.world.shape != (height, width):
+                raise ValueError('Occupancy grid has shape {}, expected {}.'.format(self.world.shape, (height, width)))
+        self.neighbour_table = NeighbourTable(self.world)
+        if self.neighbour_table.num_cells == 0:
+            raise ValueError('The world has no free cells.')
+        isolated = np.flatnonzero(~np.any(self.neighbour_table.valid_headings, axis=1))
+        if len(isolated) > 0:
+            x, y = self.neighbour_table.coords[isolated[0]]
+            raise ValueError('Free cell ({}, {}) cannot be moved out of.'.format(x, y))
+        self.robot = Robot(self.world, self.neighbour_table)
+        self.sensor = Sensor(self.world, seed=seed)
 
-    def pick_rnd_neighbours(self):
+    @classmethod
+    def from_file(cls, path, seed=None):
         """
-        Function that chooses a random neighbour and a random second neighbour to the robot.
-        :return: Random neighbour and random second neighbour.
+        Creates a world from a map file. A .npy file holds an occupancy grid (e.g. a converted image) where nonzero
+        cells are obstacles. Any other file is read as text, one row per line where '#' is an obstacle and every other
+        character is free. Row y of the map is y-coordinate y.
+        :param path: Path of the map file.
+        :param seed: (Optional) Seed of the sensor's random generator.
+        :return: World with the map.
         """
-        return choice(self.robot.neighbours), choice(self.robot.second_neighbours)
+        if path.endswith('.npy'):
+            occupancy = np.load(path) != 0
+        else:
+            with open(path) as f:
+                rows = [line.rstrip('\n') for line in f if line.strip()]
+            width = max(len(row) for row in rows)
+            occupancy = np.array([[c == '#' for c in row.ljust(width)] for row in rows])
+        height, width = occupancy.shape
+        return cls(width, height, seed=seed, occupancy=occupancy)
+
+    def sensor_feed(self, steps):
+        """
+        Simulated sensor feed. Yields the sensor reading of the robot, then moves the robot, for a number of steps.
+        :param steps: Number of readings.
+        :return: Generator of sensor readings.
+        """
+        for _ in range(steps):
+            yield self.sensor.sensor_reading(self)
+            self.robot.move()